@@ -9,17 +9,22 @@ the current tank volume at each time step. This architecture allows external sys
 to control the simulation in real-time via MQTT messaging.
 """
 
-import numpy as np
+import json
+import logging
+import math
+import queue
+import signal
+import struct
 import time
 import threading
 import sys
-from typing import Any
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable
 from paho.mqtt import client as mqtt_client
-from scipy.integrate import solve_ivp
 
 from tank_model import (
-    calculate_volume_change_rate,
-    detect_capacity_reached,
+    advance_volume_segment,
     TOTAL_SYSTEM_CAPACITY_LITERS,
     PUMP_FLOW_RATE_LITERS_PER_MIN
 )
@@ -28,30 +33,192 @@ from tank_model import (
 MQTT_BROKER_HOST = 'localhost'
 MQTT_BROKER_PORT = 1883
 MQTT_CLIENT_ID = f'python-simulator-{time.time()}'
+MQTT_MAX_INFLIGHT_MESSAGES = 200
 
 # MQTT Topics - Control Inputs (subscribed)
 TOPIC_ACTIVE_TANK_COUNT = "lift_station/active_tanks"
 TOPIC_PUMP_OPERATIONAL_STATUS = "lift_station/pump_status"
 TOPIC_FAB_OUTFLOW_RATE = "lift_station/fab_outflow"
+TOPIC_CONTROL_BUNDLE = "lift_station/control"  # All three controls as packed little-endian float32
+
+CONTROL_PAYLOAD_BINARY = False  # True = individual control topics carry little-endian float64 instead of text
+
+_CONTROL_BUNDLE_STRUCT = struct.Struct('<fff')  # active tanks, pump status, fab outflow
+_CONTROL_VALUE_STRUCT = struct.Struct('<d')
 
 # MQTT Topics - Data Output (published)
 TOPIC_CURRENT_VOLUME = "data/lift_station/current_volume" 
 
-# Simulation State Variables
-current_tank_volume_liters = 0.0
-simulation_time_elapsed_minutes = 0.0
-is_simulation_running = True
+# Simulation timing configuration
+SIMULATION_STEP_DURATION_SECONDS = 1.0
+SIMULATION_STEP_DURATION_MINUTES = SIMULATION_STEP_DURATION_SECONDS / 60.0  # 1 second in minutes
+
+# Volume publishing configuration
+VOLUME_PUBLISH_BATCH_SIZE = 1  # Samples per message (1 = publish every step as a plain number)
+VOLUME_PUBLISH_BATCH_TIMEOUT_SECONDS = 10.0  # Flush a partial batch after this long
+VOLUME_PAYLOAD_BINARY = False  # True = little-endian float64 instead of text (Node-RED flow expects text)
 
-# Dynamic Control Parameters (updated via MQTT messages)
-active_tank_count = 2.0
-pump_operational_status = 1.0  # 1.0 = ON, 0.0 = OFF
-fab_outflow_rate_per_tank = 100.0  # L/min
+_pack_volume_sample = struct.Struct('<d').pack
+
+# Console output configuration
+STATUS_LINE_PADDING = ' ' * 40 + '\r'  # Clears leftovers of a longer previous line
+CONSOLE_LOG_QUEUE_SIZE = 100  # Log lines held while the terminal is not keeping up
+CONSOLE_CLOSE_TIMEOUT_SECONDS = 2.0  # Longest wait on shutdown for queued output to be written
+MQTT_LOG_LEVEL = logging.WARNING  # Paho log records at or above this level are shown
+
+
+class ConsoleDisplay:
+    """Console output, written by a dedicated display thread.
+    
+    The simulation loop and the MQTT callbacks hand their output over instead
+    of writing to stdout, so slow terminal writes (e.g. over SSH) never block
+    them. The display thread is the only writer of the status line: log lines
+    are printed on their own line above it, and then it is redrawn.
+    
+    Memory stays bounded if stdout blocks. Only the newest status line is
+    kept. At most CONSOLE_LOG_QUEUE_SIZE log lines are queued; further lines
+    are dropped and reported as a count once the terminal catches up.
+    """
+
+    def __init__(self) -> None:
+        self._log_lines = queue.Queue(maxsize=CONSOLE_LOG_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._pending_status_line = None
+        self._dropped_log_line_count = 0
+        self._wake_event = threading.Event()
+        self._closed_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='console-display', daemon=True)
+
+    def start(self) -> None:
+        """Start the display thread."""
+        self._thread.start()
+
+    def close(self) -> None:
+        """Write out everything queued so far and stop the display thread.
+        
+        Waits at most CONSOLE_CLOSE_TIMEOUT_SECONDS, so a stalled terminal
+        cannot keep the process from exiting.
+        """
+        self._closed_event.set()
+        self._wake_event.set()
+        self._thread.join(timeout=CONSOLE_CLOSE_TIMEOUT_SECONDS)
+
+    def log(self, message: str) -> None:
+        """Queue a line to be printed above the status line.
+        
+        Args:
+            message: Line to print
+        """
+        try:
+            self._log_lines.put_nowait(message)
+        except queue.Full:
+            with self._lock:
+                self._dropped_log_line_count += 1
+        self._wake_event.set()
+
+    def show_status(self, status_line: str) -> None:
+        """Replace the status line, superseding any not yet drawn.
+        
+        Args:
+            status_line: New status line
+        """
+        with self._lock:
+            self._pending_status_line = status_line
+        self._wake_event.set()
+
+    def _run(self) -> None:
+        """Write pending output each time new output arrives (display thread)."""
+        status_line = ''
+        while True:
+            self._wake_event.wait()
+            self._wake_event.clear()
+            # Read before draining, so everything queued before close() is written
+            closing = self._closed_event.is_set()
+
+            with self._lock:
+                pending_status_line, self._pending_status_line = self._pending_status_line, None
+                dropped_log_line_count, self._dropped_log_line_count = self._dropped_log_line_count, 0
+
+            log_lines = []
+            while True:
+                try:
+                    log_lines.append(self._log_lines.get_nowait())
+                except queue.Empty:
+                    break
+            if dropped_log_line_count:
+                log_lines.append(f"({dropped_log_line_count} console messages dropped)")
+
+            for line in log_lines:
+                # Blank out the current status line and print the message in its place
+                if status_line:
+                    sys.stdout.write(' ' * len(status_line) + '\r')
+                sys.stdout.write(line + '\n')
+            if pending_status_line is not None:
+                status_line = pending_status_line
+
+            if closing:
+                # Leave the final status on its own line
+                if status_line:
+                    sys.stdout.write(status_line + '\n')
+                sys.stdout.flush()
+                return
+
+            sys.stdout.write(status_line + STATUS_LINE_PADDING)
+            sys.stdout.flush()
+
+
+class ConsoleLogHandler(logging.Handler):
+    """Logging handler that prints records through a ConsoleDisplay.
+    
+    Used for the Paho client's logger, so its messages (such as exceptions
+    caught in callbacks) are printed as separate lines instead of going
+    straight to stderr in the middle of the status line.
+    """
+
+    def __init__(self, console: ConsoleDisplay) -> None:
+        super().__init__()
+        self.console = console
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.console.log(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+@dataclass(slots=True)
+class SimulationState:
+    """Simulation state shared between the MQTT callbacks and the simulation loop.
+    
+    A single instance is created per run and handed to the MQTT callbacks as the
+    client's userdata. The callbacks write the control parameters while the
+    simulation loop reads them and advances the volume. Both normally run on
+    the same thread, but they still hold ``lock`` while touching the numeric
+    fields so the state stays consistent if the network loop is run elsewhere
+    (e.g. with loop_start()).
+    
+    Attributes:
+        current_tank_volume_liters: Current total volume in the tanks (L)
+        simulation_time_elapsed_minutes: Total simulated time (min)
+        active_tank_count: Number of tanks receiving inflow (updated via MQTT)
+        pump_operational_status: Pump state, 1.0 = ON, 0.0 = OFF (updated via MQTT)
+        fab_outflow_rate_per_tank: Fab outflow rate per tank in L/min (updated via MQTT)
+        lock: Guards the numeric fields above
+        stop_event: Set to request shutdown (e.g. on SIGTERM)
+        console: Console output, written by the display thread
+    """
+    current_tank_volume_liters: float = 0.0
+    simulation_time_elapsed_minutes: float = 0.0
+    active_tank_count: float = 2.0
+    pump_operational_status: float = 1.0
+    fab_outflow_rate_per_tank: float = 100.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    stop_event: threading.Event = field(default_factory=threading.Event)
+    console: ConsoleDisplay = field(default_factory=ConsoleDisplay)
 
-# Simulation timing configuration
-SIMULATION_STEP_DURATION_MINUTES = 1.0 / 60.0  # 1 second in minutes
 
 def handle_broker_connection(client: mqtt_client.Client, 
-                            userdata: Any, 
+                            userdata: SimulationState, 
                             flags: dict, 
                             return_code: int) -> None:
     """Handle MQTT broker connection event.
@@ -61,68 +228,153 @@ def handle_broker_connection(client: mqtt_client.Client,
     
     Args:
         client: The MQTT client instance
-        userdata: User-defined data (unused)
+        userdata: Shared simulation state (used for console output)
         flags: Connection flags from broker
         return_code: Connection result code (0 = success)
     """
     if return_code == 0:
-        print("Connected to MQTT Broker!")
+        userdata.console.log("Connected to MQTT Broker!")
         client.subscribe([
             (TOPIC_ACTIVE_TANK_COUNT, 0),
             (TOPIC_PUMP_OPERATIONAL_STATUS, 0),
-            (TOPIC_FAB_OUTFLOW_RATE, 0)
+            (TOPIC_FAB_OUTFLOW_RATE, 0),
+            (TOPIC_CONTROL_BUNDLE, 0)
         ])
     else:
-        print(f"Failed to connect, return code {return_code}")
+        userdata.console.log(f"Failed to connect, return code {return_code}")
 
 def handle_control_message(client: mqtt_client.Client, 
-                          userdata: Any, 
+                          userdata: SimulationState, 
                           message: mqtt_client.MQTTMessage) -> None:
     """Process incoming MQTT control messages.
     
     This callback updates the simulation's dynamic parameters when control
     messages are received. It handles three control topics: active tank count,
-    pump status, and fab outflow rate.
+    pump status, and fab outflow rate. Their payloads are numeric text, or an
+    8-byte little-endian float64 when CONTROL_PAYLOAD_BINARY is enabled.
+    
+    It also handles the bundle topic, whose payload carries all three values
+    as a 12-byte little-endian float32 struct (active tanks, pump status, fab
+    outflow). Publishers that change several parameters together should prefer
+    it: that is one message and no string parsing instead of three.
+    
+    Values that are not finite (NaN or infinity) are rejected like malformed
+    payloads: the model is compiled with fastmath and assumes finite inputs,
+    and a NaN volume would never recover.
     
     Args:
         client: The MQTT client instance
-        userdata: User-defined data (unused)
+        userdata: Shared simulation state to update
         message: The received MQTT message containing topic and payload
     """
-    global active_tank_count, pump_operational_status, fab_outflow_rate_per_tank
-    global simulation_time_elapsed_minutes
+    state = userdata
     
     try:
-        control_value = float(message.payload.decode())
+        if message.topic == TOPIC_CONTROL_BUNDLE:
+            tank_count, pump_status, fab_outflow_rate = _CONTROL_BUNDLE_STRUCT.unpack(message.payload)
+            if not (math.isfinite(tank_count) and math.isfinite(pump_status) and math.isfinite(fab_outflow_rate)):
+                state.console.log(f"Error: Rejected non-finite control values "
+                                  f"({tank_count}, {pump_status}, {fab_outflow_rate}) on topic {message.topic}")
+                return
+            with state.lock:
+                state.active_tank_count = tank_count
+                state.pump_operational_status = pump_status
+                state.fab_outflow_rate_per_tank = fab_outflow_rate
+                elapsed_minutes = state.simulation_time_elapsed_minutes
+            state.console.log(f"[{elapsed_minutes:.2f} min] CONTROL: Active Tanks set to {tank_count:.0f}, "
+                              f"Pump Status set to {pump_status:.0f}, "
+                              f"Fab Outflow set to {fab_outflow_rate:.1f} L/min")
+            return
+
+        if CONTROL_PAYLOAD_BINARY:
+            control_value, = _CONTROL_VALUE_STRUCT.unpack(message.payload)
+        else:
+            control_value = float(message.payload.decode())
+
+        if not math.isfinite(control_value):
+            state.console.log(f"Error: Rejected non-finite control value {control_value} on topic {message.topic}")
+            return
         
         if message.topic == TOPIC_ACTIVE_TANK_COUNT:
-            active_tank_count = control_value
-            print(f"[{simulation_time_elapsed_minutes:.2f} min] CONTROL: Active Tanks set to {active_tank_count:.0f}")
+            with state.lock:
+                state.active_tank_count = control_value
+                elapsed_minutes = state.simulation_time_elapsed_minutes
+            state.console.log(f"[{elapsed_minutes:.2f} min] CONTROL: Active Tanks set to {control_value:.0f}")
 
         elif message.topic == TOPIC_PUMP_OPERATIONAL_STATUS:
-            pump_operational_status = control_value
-            print(f"[{simulation_time_elapsed_minutes:.2f} min] CONTROL: Pump Status set to {pump_operational_status:.0f}")
+            with state.lock:
+                state.pump_operational_status = control_value
+                elapsed_minutes = state.simulation_time_elapsed_minutes
+            state.console.log(f"[{elapsed_minutes:.2f} min] CONTROL: Pump Status set to {control_value:.0f}")
             
         elif message.topic == TOPIC_FAB_OUTFLOW_RATE:
-            fab_outflow_rate_per_tank = control_value
-            print(f"[{simulation_time_elapsed_minutes:.2f} min] CONTROL: Fab Outflow set to {fab_outflow_rate_per_tank:.1f} L/min")
+            with state.lock:
+                state.fab_outflow_rate_per_tank = control_value
+                elapsed_minutes = state.simulation_time_elapsed_minutes
+            state.console.log(f"[{elapsed_minutes:.2f} min] CONTROL: Fab Outflow set to {control_value:.1f} L/min")
             
+    except struct.error:
+        expected_size = (_CONTROL_BUNDLE_STRUCT.size if message.topic == TOPIC_CONTROL_BUNDLE
+                         else _CONTROL_VALUE_STRUCT.size)
+        state.console.log(f"Error: Expected {expected_size} payload bytes on topic {message.topic}, "
+                          f"got {len(message.payload)}")
     except ValueError:
-        print(f"Error: Received non-numeric payload '{message.payload.decode()}' on topic {message.topic}")
+        # Also catches UnicodeDecodeError from binary payloads, so show the raw
+        # bytes rather than decoding them a second time
+        state.console.log(f"Error: Received non-numeric payload {message.payload!r} on topic {message.topic}")
     except Exception as error:
-        print(f"Unexpected error processing message: {error}")
+        state.console.log(f"Unexpected error processing message: {error}")
 
-def calculate_flow_rates() -> tuple[float, float]:
+def calculate_flow_rates(state: SimulationState) -> tuple[float, float]:
     """Calculate current inflow and outflow rates based on control parameters.
     
+    The caller is expected to hold ``state.lock``. This deliberately repeats
+    the formula of tank_model.calculate_total_flow_rates in plain Python: for
+    two multiplications, calling through a Numba dispatcher costs more than
+    the arithmetic itself.
+    
+    Args:
+        state: Simulation state holding the current control parameters
+        
     Returns:
         Tuple of (total_inflow_rate, total_outflow_rate) in L/min
     """
-    total_inflow_rate = fab_outflow_rate_per_tank * active_tank_count
-    total_outflow_rate = PUMP_FLOW_RATE_LITERS_PER_MIN * pump_operational_status
+    total_inflow_rate = state.fab_outflow_rate_per_tank * state.active_tank_count
+    total_outflow_rate = PUMP_FLOW_RATE_LITERS_PER_MIN * state.pump_operational_status
     return total_inflow_rate, total_outflow_rate
 
 
+def build_volume_payload(volume_samples: Iterable[tuple[float, float]]) -> str | bytes:
+    """Encode buffered volume samples as an MQTT payload.
+    
+    The layout follows the configured VOLUME_PUBLISH_BATCH_SIZE, not the number
+    of samples passed in, so consumers always see one format. That includes the
+    partial batches flushed on timeout or shutdown. Unbatched (batch size 1),
+    each sample is published as a plain number so existing consumers keep
+    working unchanged. Batched, samples are published as a JSON array of
+    [elapsed_minutes, volume_liters] pairs, oldest first, even when only one
+    is pending.
+    
+    When VOLUME_PAYLOAD_BINARY is enabled, the same layouts are sent as packed
+    little-endian float64 values instead: unbatched, the 8-byte volume;
+    batched, consecutive (elapsed_minutes, volume_liters) pairs.
+    
+    Args:
+        volume_samples: Buffered (elapsed_minutes, volume_liters) samples
+        
+    Returns:
+        Payload for the volume topic
+    """
+    samples = list(volume_samples)
+    if VOLUME_PUBLISH_BATCH_SIZE == 1:
+        if VOLUME_PAYLOAD_BINARY:
+            return _pack_volume_sample(samples[0][1])
+        return f"{samples[0][1]:.2f}"
+    if VOLUME_PAYLOAD_BINARY:
+        return struct.pack(f'<{2 * len(samples)}d', *(value for sample in samples for value in sample))
+    return json.dumps([[round(elapsed, 4), round(volume, 2)] for elapsed, volume in samples])
+
+
 def format_status_display(elapsed_seconds: float, 
                          elapsed_minutes: float, 
                          volume: float, 
@@ -149,126 +401,220 @@ def format_status_display(elapsed_seconds: float,
     )
 
 
-def run_simulation_loop(mqtt_client: mqtt_client.Client) -> None:
+def service_mqtt_network(client: mqtt_client.Client, 
+                         state: SimulationState, 
+                         deadline: float) -> bool:
+    """Run the MQTT network loop on the calling thread until a deadline.
+    
+    The client has no background network thread, so the simulation loop
+    uses the idle time between steps to receive control messages, send
+    keepalives and flush pending writes. Callbacks therefore run on the
+    calling thread; the client is configured to log, rather than raise,
+    exceptions from them so a bad message cannot end the simulation.
+    
+    Args:
+        client: Connected MQTT client
+        state: Shared simulation state, checked for a shutdown request
+        deadline: time.monotonic() value at which to return
+        
+    Returns:
+        True if shutdown was requested, False once the deadline is reached
+    """
+    while not state.stop_event.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+
+        if client.loop(timeout=remaining) != mqtt_client.MQTT_ERR_SUCCESS:
+            # Connection lost: try to reconnect, backing off until the deadline on failure
+            try:
+                client.reconnect()
+            except OSError:
+                state.stop_event.wait(timeout=max(0.0, deadline - time.monotonic()))
+
+    return True
+
+
+def run_simulation_loop(mqtt_client: mqtt_client.Client, state: SimulationState) -> None:
     """Execute the main simulation control loop.
     
-    This function runs the ODE solver in 1-second segments, synchronized with
-    real-time. Each iteration solves the differential equation for the current
-    control parameters, updates the global state, publishes results via MQTT,
-    and displays status information.
+    This function advances the tank model in 1-second segments, synchronized with
+    real-time. Because the control parameters are held constant over a segment,
+    each iteration applies the closed-form solution of the differential equation
+    (advance_volume_segment, compiled with Numba), updates the shared state,
+    reports when capacity is reached, publishes results via MQTT, and displays
+    status information. The status line is only rewritten when the displayed
+    volume or flow rates change. All console output is handed to a separate
+    display thread, so this loop never writes to the terminal itself.
+    
+    Volume samples are buffered and published together once
+    VOLUME_PUBLISH_BATCH_SIZE samples have accumulated or
+    VOLUME_PUBLISH_BATCH_TIMEOUT_SECONDS have passed since the last publish.
+    Any partial batch still buffered when the loop exits is published then.
     
-    The loop continues until is_simulation_running is set to False.
+    Iterations are scheduled against monotonic deadlines one step apart, so the
+    time spent publishing and displaying does not accumulate as drift. The time
+    until the next deadline is spent servicing the MQTT network loop, and
+    publishes are written to the socket directly from this thread. The loop
+    continues until state.stop_event is set (initialize_and_run_mqtt_simulation
+    sets it on SIGTERM). The event is checked between network loop waits, so
+    the loop exits, and publishes any partial batch, within one step.
     
     Args:
         mqtt_client: Connected MQTT client for publishing volume data
+        state: Shared simulation state, also updated by the MQTT callbacks
     """
-    global current_tank_volume_liters, simulation_time_elapsed_minutes
-    global active_tank_count, pump_operational_status, fab_outflow_rate_per_tank
-    global is_simulation_running
+    state.console.log("--- Simulation Controller Started (1-second step size) ---")
 
-    print("--- Simulation Controller Started (1-second step size) ---")
-    
-    detect_capacity_reached.terminal = True
-    detect_capacity_reached.direction = 1
+    # Bind loop-invariant globals and methods to locals (fast local lookups per step)
+    step_duration_seconds = SIMULATION_STEP_DURATION_SECONDS
+    step_duration_minutes = SIMULATION_STEP_DURATION_MINUTES
+    pump_flow_rate = PUMP_FLOW_RATE_LITERS_PER_MIN
+    total_capacity = TOTAL_SYSTEM_CAPACITY_LITERS
+    publish_batch_size = VOLUME_PUBLISH_BATCH_SIZE
+    publish_batch_timeout = VOLUME_PUBLISH_BATCH_TIMEOUT_SECONDS
+    monotonic = time.monotonic
+    publish = mqtt_client.publish
 
-    while is_simulation_running:
-        time.sleep(1)  # Synchronize with real-time (1 second pause)
-        
-        segment_start_time = simulation_time_elapsed_minutes
-        segment_end_time = segment_start_time + SIMULATION_STEP_DURATION_MINUTES
-        
-        model_parameters = (
-            fab_outflow_rate_per_tank,
-            PUMP_FLOW_RATE_LITERS_PER_MIN,
-            active_tank_count,
-            pump_operational_status,
-            TOTAL_SYSTEM_CAPACITY_LITERS
-        )
+    pending_volume_samples = deque(maxlen=publish_batch_size)
+    last_publish_time = monotonic()
+    next_step_deadline = last_publish_time + step_duration_seconds
+    last_displayed_values = None
 
-        try:
-            solver_result = solve_ivp(
-                calculate_volume_change_rate,
-                t_span=[segment_start_time, segment_end_time],
-                y0=np.array([current_tank_volume_liters]),
-                events=detect_capacity_reached,
-                args=model_parameters
-            )
-        except Exception as solver_error:
-            print(f"\n[ERROR] Solver failed: {solver_error}")
-            is_simulation_running = False
-            break
-
-        if solver_result.t.size > 0:
-            simulation_time_elapsed_minutes = solver_result.t[-1]
-            current_tank_volume_liters = solver_result.y[0][-1]
-        
-        # Ensure volume doesn't exceed capacity in reporting
-        if current_tank_volume_liters > TOTAL_SYSTEM_CAPACITY_LITERS:
-            current_tank_volume_liters = TOTAL_SYSTEM_CAPACITY_LITERS
-            
-        total_inflow, total_outflow = calculate_flow_rates()
-        
-        # Publish current volume to MQTT
-        volume_payload = f"{current_tank_volume_liters:.2f}"
-        mqtt_client.publish(TOPIC_CURRENT_VOLUME, volume_payload, qos=0)
+    try:
+        # Synchronize with real-time on a fixed-rate schedule, waking early on shutdown.
+        # Waiting until a deadline (rather than a fixed 1 second) absorbs the time spent
+        # on each iteration, so the simulation clock does not drift behind wall-clock.
+        while not service_mqtt_network(mqtt_client, state, next_step_deadline):
+            next_step_deadline += step_duration_seconds
+
+            with state.lock:
+                total_inflow, total_outflow = calculate_flow_rates(state)
+                net_flow_rate = total_inflow - total_outflow
+                segment_start_time = state.simulation_time_elapsed_minutes
+                segment_start_volume = state.current_tank_volume_liters
+
+                # Skip the model update when the volume cannot change during this
+                # segment: no net flow, full while filling, or empty while draining
+                if (net_flow_rate == 0.0
+                        or (net_flow_rate > 0.0 and segment_start_volume >= total_capacity)
+                        or (net_flow_rate < 0.0 and segment_start_volume <= 0.0)):
+                    time_to_capacity = -1.0
+                else:
+                    state.current_tank_volume_liters, time_to_capacity = advance_volume_segment(
+                        segment_start_volume,
+                        step_duration_minutes,
+                        state.fab_outflow_rate_per_tank,
+                        pump_flow_rate,
+                        state.active_tank_count,
+                        state.pump_operational_status,
+                        total_capacity
+                    )
+                state.simulation_time_elapsed_minutes += step_duration_minutes
+
+                current_tank_volume_liters = state.current_tank_volume_liters
+                simulation_time_elapsed_minutes = state.simulation_time_elapsed_minutes
+
+            if time_to_capacity >= 0.0:
+                state.console.log(
+                    f"[{segment_start_time + time_to_capacity:.2f} min] EVENT: Tank capacity reached, overflowing"
+                )
+
+            # Buffer the current volume and publish once the batch is full or stale
+            pending_volume_samples.append((simulation_time_elapsed_minutes, current_tank_volume_liters))
+            if (len(pending_volume_samples) >= publish_batch_size
+                    or monotonic() - last_publish_time >= publish_batch_timeout):
+                volume_payload = build_volume_payload(pending_volume_samples)
+                publish(TOPIC_CURRENT_VOLUME, volume_payload, qos=0)
+                pending_volume_samples.clear()
+                last_publish_time = monotonic()
         
-        # Display real-time status
-        elapsed_seconds = simulation_time_elapsed_minutes * 60
-        status_message = format_status_display(
-            elapsed_seconds,
-            simulation_time_elapsed_minutes,
-            current_tank_volume_liters,
-            total_inflow,
-            total_outflow
-        )
-        sys.stdout.write(status_message + '                                        \r')
-        sys.stdout.flush()
+            # Display real-time status, skipping the terminal write when the
+            # displayed volume and flow rates have not changed
+            displayed_values = (
+                round(current_tank_volume_liters),
+                round(total_inflow),
+                round(total_outflow)
+            )
+            if displayed_values != last_displayed_values:
+                elapsed_seconds = simulation_time_elapsed_minutes * 60
+                status_message = format_status_display(
+                    elapsed_seconds,
+                    simulation_time_elapsed_minutes,
+                    current_tank_volume_liters,
+                    total_inflow,
+                    total_outflow
+                )
+                state.console.show_status(status_message)
+                last_displayed_values = displayed_values
+    finally:
+        # Publish samples still waiting for a full batch so none are lost on shutdown
+        if pending_volume_samples:
+            publish(TOPIC_CURRENT_VOLUME, build_volume_payload(pending_volume_samples), qos=0)
 
 def initialize_and_run_mqtt_simulation() -> None:
     """Initialize MQTT client and start the simulation.
     
     This function sets up the MQTT client with appropriate callbacks,
-    connects to the broker, and launches the simulation loop in a
-    separate thread. The main thread remains active to handle MQTT
-    messages and graceful shutdown on keyboard interrupt.
+    connects to the broker, and runs the simulation loop on the calling
+    thread. The loop also drives the MQTT network I/O, so control callbacks,
+    model updates and publishes all happen on one thread with no Paho
+    network thread. A keyboard interrupt or SIGTERM (e.g. from systemd or
+    docker stop) stops the loop and disconnects gracefully.
+    
+    All console output, including the client's own log records, goes
+    through the simulation state's display thread, which is started first
+    and closed last.
     """
-    global is_simulation_running
-
-    mqtt_sim_client = mqtt_client.Client(
-        mqtt_client.CallbackAPIVersion.VERSION1,
-        MQTT_CLIENT_ID
-    )
-    mqtt_sim_client.on_connect = handle_broker_connection
-    mqtt_sim_client.on_message = handle_control_message
+    simulation_state = SimulationState()
+    console = simulation_state.console
+    console.start()
 
     try:
-        mqtt_sim_client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT)
-    except ConnectionRefusedError:
-        print(f"ERROR: Could not connect to broker at {MQTT_BROKER_HOST}:{MQTT_BROKER_PORT}.")
-        print("Please ensure the MQTT broker is running.")
-        return
-    except Exception as connection_error:
-        print(f"ERROR: Failed to connect to MQTT broker: {connection_error}")
-        return
-
-    mqtt_sim_client.loop_start()
-
-    simulation_thread = threading.Thread(
-        target=run_simulation_loop,
-        args=(mqtt_sim_client,),
-        daemon=True
-    )
-    simulation_thread.start()
+        mqtt_sim_client = mqtt_client.Client(
+            mqtt_client.CallbackAPIVersion.VERSION1,
+            MQTT_CLIENT_ID,
+            userdata=simulation_state
+        )
+        mqtt_sim_client.on_connect = handle_broker_connection
+        mqtt_sim_client.on_message = handle_control_message
+        mqtt_sim_client.max_inflight_messages_set(MQTT_MAX_INFLIGHT_MESSAGES)
+        # Callbacks run inside the simulation loop, so log callback errors instead of
+        # letting them propagate out of client.loop() and stop the simulation
+        mqtt_sim_client.suppress_exceptions = True
+        # Print the client's warnings and errors through the display thread, not stderr
+        mqtt_logger = logging.getLogger(f'{__name__}.mqtt')
+        mqtt_logger.setLevel(MQTT_LOG_LEVEL)
+        mqtt_logger.propagate = False
+        mqtt_log_handler = ConsoleLogHandler(console)
+        mqtt_log_handler.setFormatter(logging.Formatter('MQTT %(levelname)s: %(message)s'))
+        mqtt_logger.addHandler(mqtt_log_handler)
+        mqtt_sim_client.enable_logger(mqtt_logger)
 
-    try:
-        while is_simulation_running:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("\nSimulation stopping...")
+        try:
+            mqtt_sim_client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT)
+        except ConnectionRefusedError:
+            console.log(f"ERROR: Could not connect to broker at {MQTT_BROKER_HOST}:{MQTT_BROKER_PORT}.")
+            console.log("Please ensure the MQTT broker is running.")
+            return
+        except Exception as connection_error:
+            console.log(f"ERROR: Failed to connect to MQTT broker: {connection_error}")
+            return
+
+        # Let the loop finish its current step on SIGTERM instead of being killed mid-step
+        signal.signal(signal.SIGTERM, lambda signal_number, frame: simulation_state.stop_event.set())
+
+        try:
+            run_simulation_loop(mqtt_sim_client, simulation_state)
+        except KeyboardInterrupt:
+            pass  # Ctrl+C is the normal way to stop an interactive run
+        finally:
+            console.log("Simulation stopping...")
+            simulation_state.stop_event.set()
+            mqtt_sim_client.disconnect()
+            console.log("MQTT client and simulation stopped.")
     finally:
-        is_simulation_running = False
-        mqtt_sim_client.loop_stop()
-        print("MQTT client and simulation stopped.")
+        console.close()
 
 
 if __name__ == '__main__':
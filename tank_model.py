@@ -5,17 +5,59 @@ The model calculates volume changes based on inflow from fab facilities and
 outflow from pumping equipment, with overflow handling when tanks reach capacity.
 
 The model is designed to be driven by an external controller that manages dynamic
-parameters such as active tank count and pump status.
+parameters such as active tank count and pump status. The right-hand side and
+event functions follow the scipy.integrate.solve_ivp calling convention. SciPy
+is optional: when it is installed, run_test_scenario integrates them to
+cross-check the closed-form results.
 """
 
 import numpy as np
-from scipy.integrate import solve_ivp
+from numba import njit
+
+try:
+    from scipy.integrate import solve_ivp
+except ImportError:  # Optional dependency, only used to cross-check run_test_scenario
+    solve_ivp = None
 
 # Physical system constants - these represent fixed infrastructure characteristics
 INDIVIDUAL_TANK_CAPACITY_LITERS = 10000.0
 TOTAL_SYSTEM_CAPACITY_LITERS = INDIVIDUAL_TANK_CAPACITY_LITERS * 2.0
 PUMP_FLOW_RATE_LITERS_PER_MIN = 60.0
 
+# Explicit signatures make Numba compile (or load from its on-disk cache) at import
+# time instead of on the first call, so the real-time loop never pauses for the JIT
+_FLOW_RATES_SIGNATURE = "UniTuple(float64, 2)(float64, float64, float64, float64)"
+_SEGMENT_SIGNATURE = "UniTuple(float64, 2)(float64, float64, float64, float64, float64, float64, float64)"
+
+# dV/dt does not depend on V, so its Jacobian is identically zero
+_VOLUME_CHANGE_JACOBIAN = np.zeros((1, 1))
+_VOLUME_CHANGE_JACOBIAN.flags.writeable = False
+
+@njit(_FLOW_RATES_SIGNATURE, cache=True, fastmath=True)
+def calculate_total_flow_rates(fab_outflow_rate: float, 
+                               pump_flow_rate: float, 
+                               active_tank_count: float, 
+                               pump_status: float) -> tuple[float, float]:
+    """Calculate the total inflow and outflow rates of the tank system.
+    
+    The flow balance shared by the compiled model functions below and by
+    run_test_scenario. The plain-Python callers that run on every solver
+    evaluation or simulation step (calculate_volume_change_rate and the
+    client's calculate_flow_rates) deliberately write the same two products
+    inline, since calling through the Numba dispatcher costs more than the
+    arithmetic. Keep them in step with this function.
+    
+    Args:
+        fab_outflow_rate: Flow rate from fab facility per tank (L/min)
+        pump_flow_rate: Maximum flow rate of a single pump (L/min)
+        active_tank_count: Number of tanks currently receiving inflow (0-2)
+        pump_status: Pump operational state (0=off, 1=on)
+        
+    Returns:
+        Tuple of (total_inflow_rate, total_outflow_rate) in L/min
+    """
+    return fab_outflow_rate * active_tank_count, pump_flow_rate * pump_status
+
 def calculate_volume_change_rate(time: float, 
                                   volume: np.ndarray, 
                                   fab_outflow_rate: float, 
@@ -29,6 +71,11 @@ def calculate_volume_change_rate(time: float,
     The net flow rate is the difference between inflow and outflow, unless
     the system is at capacity with positive net flow (overflow condition).
     
+    It is deliberately plain Python, with the flow balance of
+    calculate_total_flow_rates written out inline: the solver calls it with a
+    NumPy array and expects one back, and going through a Numba dispatcher
+    for that costs more than the two multiplications it does.
+    
     Args:
         time: Current simulation time in minutes (required by solver, unused in calculation)
         volume: Array containing current total volume in liters
@@ -53,6 +100,67 @@ def calculate_volume_change_rate(time: float,
     
     return np.array([net_flow_rate])
 
+def calculate_volume_change_jacobian(time: float, volume: np.ndarray, *args) -> np.ndarray:
+    """Calculate the Jacobian of calculate_volume_change_rate with respect to volume.
+    
+    The volume change rate is piecewise constant in volume (it only switches to
+    zero at capacity), so the Jacobian is zero everywhere it is defined. Passed
+    as ``jac=`` to implicit solvers (BDF, Radau, or LSODA once it switches to
+    its stiff method) in place of a finite-difference estimate.
+    
+    Args:
+        time: Current simulation time (unused)
+        volume: Array containing current volume (unused)
+        *args: Model parameters passed by solver (unused)
+        
+    Returns:
+        Shared read-only 1x1 zero matrix
+    """
+    return _VOLUME_CHANGE_JACOBIAN
+
+@njit(_SEGMENT_SIGNATURE, cache=True, fastmath=True)
+def advance_volume_segment(volume: float, 
+                           segment_duration: float, 
+                           fab_outflow_rate: float, 
+                           pump_flow_rate: float, 
+                           active_tank_count: float, 
+                           pump_status: float, 
+                           total_capacity: float) -> tuple[float, float]:
+    """Advance the tank volume over one segment with constant control parameters.
+    
+    With constant parameters dV/dt is constant, so the exact solution is a
+    linear update clipped to the empty and full limits. This gives the same
+    result as integrating calculate_volume_change_rate with the
+    detect_capacity_reached event, without a solver. Compiled with Numba for
+    float64 arguments when the module is imported.
+    
+    Args:
+        volume: Total volume at the start of the segment (L)
+        segment_duration: Length of the segment (min)
+        fab_outflow_rate: Flow rate from fab facility per tank (L/min)
+        pump_flow_rate: Maximum flow rate of a single pump (L/min)
+        active_tank_count: Number of tanks currently receiving inflow (0-2)
+        pump_status: Pump operational state (0=off, 1=on)
+        total_capacity: Maximum combined capacity of both tanks (L)
+        
+    Returns:
+        Tuple of (volume at the end of the segment in L, time into the segment
+        at which capacity was reached in min, or -1.0 if it was not reached
+        during this segment)
+    """
+    total_inflow_rate, total_outflow_rate = calculate_total_flow_rates(
+        fab_outflow_rate, pump_flow_rate, active_tank_count, pump_status
+    )
+    net_flow_rate = total_inflow_rate - total_outflow_rate
+    projected_volume = volume + net_flow_rate * segment_duration
+
+    if net_flow_rate > 0 and projected_volume >= total_capacity:
+        if volume < total_capacity:
+            return total_capacity, (total_capacity - volume) / net_flow_rate
+        return total_capacity, -1.0
+
+    return max(projected_volume, 0.0), -1.0
+
 def detect_capacity_reached(time: float, volume: np.ndarray, *args) -> float:
     """Detect when tank volume reaches maximum capacity.
     
@@ -83,6 +191,12 @@ def run_test_scenario():
     that the system correctly calculates volume changes and detects when
     capacity is reached.
     
+    With constant control parameters the net flow is constant, so the volume
+    curve is evaluated in closed form (linear ramp clipped to capacity) over all
+    output points at once instead of being integrated numerically. If SciPy is
+    installed, the ODE model is also integrated with solve_ivp (LSODA) and compared
+    against the closed-form curve and capacity time.
+    
     Test parameters:
     - Initial volume: 0 L (empty tanks)
     - Both tanks active (receiving inflow)
@@ -96,8 +210,9 @@ def run_test_scenario():
     active_tank_count = 2.0  # Both tanks receiving inflow
     pump_status = 1.0  # Pump operating
     
-    total_inflow = FAB_OUTFLOW_RATE * active_tank_count
-    total_outflow = PUMP_FLOW_RATE_LITERS_PER_MIN * pump_status
+    total_inflow, total_outflow = calculate_total_flow_rates(
+        FAB_OUTFLOW_RATE, PUMP_FLOW_RATE_LITERS_PER_MIN, active_tank_count, pump_status
+    )
     
     print(f"--- Running Test Scenario: Inflow={total_inflow:.1f} L/min, Outflow={total_outflow:.1f} L/min ---")
     
@@ -108,29 +223,23 @@ def run_test_scenario():
     # Generate output points every 10 minutes
     time_evaluation_points = np.linspace(time_span[0], time_span[1], 31)
 
-    model_parameters = (FAB_OUTFLOW_RATE, PUMP_FLOW_RATE_LITERS_PER_MIN, 
-                       active_tank_count, pump_status, TOTAL_SYSTEM_CAPACITY_LITERS)
-
-    result = solve_ivp(
-        calculate_volume_change_rate, 
-        t_span=time_span, 
-        y0=np.array([initial_volume]), 
-        t_eval=time_evaluation_points,
-        events=detect_capacity_reached, 
-        args=model_parameters
-    )
+    net_flow_rate = total_inflow - total_outflow
+    volume_values = np.clip(initial_volume + net_flow_rate * time_evaluation_points,
+                            0.0, TOTAL_SYSTEM_CAPACITY_LITERS)
     
     capacity_reached_time = 0.0
     
-    # Check if capacity was reached during simulation
-    if result.t_events[0].size > 0:
-        capacity_reached_time = result.t_events[0][0] 
+    # Check if capacity was reached during simulation (only possible while filling)
+    if net_flow_rate > 0:
+        time_to_capacity = (TOTAL_SYSTEM_CAPACITY_LITERS - initial_volume) / net_flow_rate
+        if time_to_capacity <= simulation_end_time:
+            capacity_reached_time = time_to_capacity
         
     print("\nSimulation Results (Volume over Time):")
     print("Time (min) | Volume (L) | Status")
     print("-" * 35)
     
-    for time_point, volume_value in zip(result.t, result.y[0]):
+    for time_point, volume_value in zip(time_evaluation_points, volume_values):
         status = "Filling"
         
         if capacity_reached_time > 0 and time_point >= capacity_reached_time:
@@ -140,12 +249,48 @@ def run_test_scenario():
         print(f"{time_point:10.2f} | {volume_value:10.2f} | {status}")
 
     if capacity_reached_time > 0:
-        overflow_rate = (FAB_OUTFLOW_RATE * active_tank_count) - (PUMP_FLOW_RATE_LITERS_PER_MIN * pump_status)
+        overflow_rate = net_flow_rate
         print(f"\n SUCCESS: Tank capacity reached at t = {capacity_reached_time:.2f} minutes.")
         print(f"   Steady-state overflow rate into pit: {overflow_rate:.1f} L/min.")
     else:
         print("\n FAILED: Tank capacity was not reached during the simulation.")
 
+    if solve_ivp is None:
+        print("\n Skipped solve_ivp cross-check (scipy is not installed).")
+        return
+
+    # Cross-check the closed form against numerical integration of the ODE model
+    model_parameters = (FAB_OUTFLOW_RATE, PUMP_FLOW_RATE_LITERS_PER_MIN, 
+                       active_tank_count, pump_status, TOTAL_SYSTEM_CAPACITY_LITERS)
+
+    # The overflow event can only fire while filling, so skip event root-finding otherwise
+    capacity_event = detect_capacity_reached if net_flow_rate > 0 else None
+
+    result = solve_ivp(
+        calculate_volume_change_rate, 
+        t_span=time_span, 
+        y0=np.array([initial_volume]), 
+        method='LSODA',
+        t_eval=time_evaluation_points,
+        events=capacity_event, 
+        args=model_parameters,
+        jac=calculate_volume_change_jacobian
+    )
+
+    integrated_capacity_time = 0.0
+    if result.t_events is not None and result.t_events[0].size > 0:
+        integrated_capacity_time = result.t_events[0][0]
+
+    # The terminal event stops integration, so compare only the points it reached.
+    # LSODA locates the event from its interpolant, so the capacity time is only
+    # required to agree to within one 1-second simulation step.
+    capacity_time_tolerance = 1.0 / 60.0
+    if (np.allclose(result.y[0], volume_values[:result.t.size])
+            and np.isclose(integrated_capacity_time, capacity_reached_time, rtol=0.0, atol=capacity_time_tolerance)):
+        print(" SUCCESS: solve_ivp cross-check matches the closed-form results.")
+    else:
+        print(f" FAILED: solve_ivp cross-check differs (capacity at t = {integrated_capacity_time:.2f} minutes).")
+
 
 if __name__ == "__main__":
     run_test_scenario()
\ No newline at end of file